@@ -5,10 +5,41 @@ Generates a per-message deterministic 'k' from private key and message hash.
 Supports hash functions from hashlib: sha256, sha384, sha512.
 """
 
-import hmac
 import hashlib
+from functools import lru_cache
 from typing import Callable
 
+_TRANS_36 = bytes(x ^ 0x36 for x in range(256))
+_TRANS_5C = bytes(x ^ 0x5C for x in range(256))
+
+@lru_cache(maxsize=None)
+def _block_size(hash_func: Callable[..., "hashlib._Hash"]) -> int:
+    return hash_func().block_size
+
+class _HmacFast:
+    """HMAC that keeps the keyed inner/outer hash states for reuse."""
+    def __init__(self, hash_func: Callable[..., "hashlib._Hash"]):
+        self.hash_func = hash_func
+        self.block_size = _block_size(hash_func)
+        self._inner = None
+        self._outer = None
+
+    def rekey(self, key: bytes) -> None:
+        """Precompute the ipad/opad hash states for a new key."""
+        if len(key) > self.block_size:
+            key = self.hash_func(key).digest()
+        key = key.ljust(self.block_size, b"\x00")
+        self._inner = self.hash_func(key.translate(_TRANS_36))
+        self._outer = self.hash_func(key.translate(_TRANS_5C))
+
+    def compute(self, msg: bytes) -> bytes:
+        """Return HMAC(key, msg) for the current key."""
+        inner = self._inner.copy()
+        inner.update(msg)
+        outer = self._outer.copy()
+        outer.update(inner.digest())
+        return outer.digest()
+
 def bits2int(b: bytes, qlen: int) -> int:
     i = int.from_bytes(b, "big")
     blen = len(b) * 8
@@ -25,27 +56,35 @@ def bits2octets(b: bytes, q: int, qlen: int) -> bytes:
     rolen = (qlen + 7) // 8
     return int2octets(z2, rolen)
 
-def generate_k(hash_func: Callable[..., "hashlib._Hash"], q: int, x: int, h1: bytes) -> int:
-    """Returns deterministic nonce k in range [1, q-1]"""
-    qlen = q.bit_length()
-    hlen = hash_func().digest_size
-    rolen = (qlen + 7) // 8
+def generate_k(hash_func: Callable[..., "hashlib._Hash"], q: int, qlen: int, rolen: int, hlen: int,
+               x: int, h1: bytes) -> int:
+    """Returns deterministic nonce k in range [1, q-1]
+
+    qlen, rolen and hlen are the bit length of q, its byte length and the
+    digest size of hash_func, precomputed by the caller.
+    """
+    hm = _HmacFast(hash_func)
 
     V = b"\x01" * hlen
     K = b"\x00" * hlen
     bx = int2octets(x, rolen) + bits2octets(h1, q, qlen)
-    K = hmac.new(K, V + b"\x00" + bx, hash_func).digest()
-    V = hmac.new(K, V, hash_func).digest()
-    K = hmac.new(K, V + b"\x01" + bx, hash_func).digest()
-    V = hmac.new(K, V, hash_func).digest()
+    hm.rekey(K)
+    K = hm.compute(V + b"\x00" + bx)
+    hm.rekey(K)
+    V = hm.compute(V)
+    K = hm.compute(V + b"\x01" + bx)
+    hm.rekey(K)
+    V = hm.compute(V)
 
+    T = bytearray(rolen)
     while True:
-        T = b""
-        while len(T) < rolen:
-            V = hmac.new(K, V, hash_func).digest()
-            T += V
+        # Only the leftmost qlen bits of T are used, so rolen bytes suffice
+        for off in range(0, rolen, hlen):
+            V = hm.compute(V)
+            T[off:off + hlen] = V[:rolen - off]
         k = bits2int(T, qlen)
         if 1 <= k < q:
             return k
-        K = hmac.new(K, V + b"\x00", hash_func).digest()
-        V = hmac.new(K, V, hash_func).digest()
+        K = hm.compute(V + b"\x00")
+        hm.rekey(K)
+        V = hm.compute(V)
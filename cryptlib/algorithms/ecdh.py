@@ -21,12 +21,12 @@ class ECDH(ECDHInterface):
     def generate_keypair(self):
         """Returns public and private key"""
         private_scalar = secrets.randbelow(self.curve.n - 1) + 1
-        public_point = self.curve.scalar_mult(private_scalar)
+        public_point = self.curve.scalar_mult_base(private_scalar)
         return public_point, private_scalar
 
     def derive_shared_secret(self, private_scalar: int, peer_public_point: Point):
         """Returns shared secret"""
-        shared_point = self.curve.scalar_mult(private_scalar, peer_public_point)
+        shared_point = self.curve.scalar_mult_ladder(private_scalar, peer_public_point)
         if shared_point is None or shared_point.is_infinite():
             raise ValueError("Invalid shared point")
         return shared_point.x
@@ -2,20 +2,28 @@
 Wrapper for post-quantum CRYSTALS-Kyber Key Encapsulation Mechanism (KEM).
 
 Supports Kyber-512, Kyber-768, Kyber-1024 using external pqcrypto library.
-All keys and ciphertexts are in bytes.
+All keys and ciphertexts are in bytes. The pqcrypto module of a variant is
+imported only when that variant is first used.
 """
 
+import importlib
 from cryptlib.core.interfaces import KEMInterface
-import pqcrypto.kem.ml_kem_512 as kyber512
-import pqcrypto.kem.ml_kem_768 as kyber768
-import pqcrypto.kem.ml_kem_1024 as kyber1024
 
 KYBER_MAP = {
-    "Kyber-512": kyber512,
-    "Kyber-768": kyber768,
-    "Kyber-1024": kyber1024
+    "Kyber-512": "pqcrypto.kem.ml_kem_512",
+    "Kyber-768": "pqcrypto.kem.ml_kem_768",
+    "Kyber-1024": "pqcrypto.kem.ml_kem_1024"
 }
 
+# Variant modules imported so far; each one loads its own shared library
+_LOADED_KEMS = {}
+
+def _load_kem(variant: str):
+    """Import the pqcrypto module for a Kyber variant on first use."""
+    if variant not in _LOADED_KEMS:
+        _LOADED_KEMS[variant] = importlib.import_module(KYBER_MAP[variant])
+    return _LOADED_KEMS[variant]
+
 class KyberKEM(KEMInterface):
     """KEM wrapper for CRYSTALS-Kyber."""
 
@@ -23,17 +31,16 @@ class KyberKEM(KEMInterface):
         # Initialize KEM with a specific Kyber variant
         if variant not in KYBER_MAP:
             raise ValueError(f"Unsupported Kyber variant: {variant}")
-        self.kem = KYBER_MAP[variant]
+        self.kem = _load_kem(variant)
 
     def generate_keypair(self) -> tuple[bytes, bytes]:
         # Returns public and private key in bytes
-        pk, sk = self.kem.generate_keypair()
-        return pk, sk
+        return self.kem.generate_keypair()
 
     def encapsulate(self, public_key: bytes) -> tuple[bytes, bytes]:
-        # Returns ciphertext and shared secret for given public key
-        ciphertext, shared_secret = self.kem.encrypt(public_key)
-        return ciphertext, shared_secret
+        # Returns ciphertext and shared secret for given public key, as produced
+        # by pqcrypto; the bytes objects are not copied and belong to the caller
+        return self.kem.encrypt(public_key)
 
     def decapsulate(self, private_key: bytes, ciphertext: bytes) -> bytes:
         # Returns shared secret from private key and received ciphertext
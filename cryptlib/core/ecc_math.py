@@ -1,73 +1,173 @@
 """
 Elliptic curve arithmetic and helper functions.
 
-Provides modular inverse, Tonelli-Shanks square root, Point class,
+Provides modular inverse, Cipolla/Tonelli-Shanks square root, Point class,
 and Curve class for scalar multiplication and point addition.
+Field arithmetic uses gmpy2 (GMP) integers when it is installed.
 """
 
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Optional
 
+try:
+    from gmpy2 import mpz, invert, powmod
+    HAS_GMPY2 = True
+except ImportError:
+    mpz = int
+    powmod = pow
+    HAS_GMPY2 = False
+
 def modinv(a: int, m: int) -> int:
     """Compute modular inverse of a modulo m."""
     if a == 0:
         raise ValueError("Inverse does not exist for 0")
-    lm, hm = 1, 0
-    low, high = a % m, m
-    while low > 1:
-        r = high // low
-        nm = hm - lm * r
-        new = high - low * r
-        hm, lm = lm, nm
-        high, low = low, new
-    return lm % m
+    if HAS_GMPY2:
+        try:
+            return int(invert(mpz(a), mpz(m)))
+        except ZeroDivisionError:
+            raise ValueError("Inverse does not exist") from None
+    return pow(a, -1, m)
+
+def _field_inv(a, m):
+    """Inverse of a field element, kept in the backend integer type."""
+    if HAS_GMPY2:
+        return invert(a, m)
+    return modinv(a, m)
+
+@lru_cache(maxsize=None)
+def _tonelli_constants(p: int) -> tuple:
+    """Return (q, s, c) with p - 1 = q * 2^s and c = z^q for a non-residue z."""
+    p = mpz(p)
+    q = p - 1
+    s = 0
+    while q % 2 == 0:
+        q //= 2
+        s += 1
+    z = 2
+    while powmod(z, (p - 1) // 2, p) != p - 1:
+        z += 1
+    return q, s, powmod(z, q, p)
+
+def _cipolla_sqrt(a, p) -> Optional[int]:
+    """Square root of a quadratic residue a mod p using Cipolla's algorithm."""
+    # Find t such that w = t^2 - a is a non-residue, then work in Fp[sqrt(w)]
+    t = mpz(1)
+    while True:
+        w = (t * t - a) % p
+        if w == 0:
+            return int(t)
+        if powmod(w, (p - 1) // 2, p) == p - 1:
+            break
+        t += 1
+        if t >= p:
+            return None
+    # (x0 + x1*sqrt(w))^((p + 1) / 2) by square-and-multiply
+    x0, x1 = mpz(1), mpz(0)
+    for bit in bin((p + 1) // 2)[2:]:
+        x0, x1 = (x0 * x0 + x1 * x1 * w) % p, 2 * x0 * x1 % p
+        if bit == "1":
+            x0, x1 = (x0 * t + x1 * w) % p, (x0 + x1 * t) % p
+    if x1 != 0 or x0 * x0 % p != a % p:
+        return None
+    return int(x0)
 
 def modular_sqrt(a: int, p: int) -> int:
-    """Compute square root of a modulo p using Tonelli-Shanks algorithm."""
+    """Compute square root of a modulo p using Cipolla or Tonelli-Shanks algorithm."""
     if a == 0:
         return 0
     if p == 2:
         return a % 2
-    ls = pow(a, (p - 1) // 2, p)
+    a, p = mpz(a), mpz(p)
+    ls = powmod(a, (p - 1) // 2, p)
     if ls != 1:
         raise ValueError("No square root exists")
     if p % 4 == 3:
-        return pow(a, (p + 1) // 4, p)
-    q = p - 1
-    s = 0
-    while q % 2 == 0:
-        q //= 2
-        s += 1
-    z = 2
-    while pow(z, (p - 1) // 2, p) != p - 1:
-        z += 1
-    m = s
-    c = pow(z, q, p)
-    t = pow(a, q, p)
-    r = pow(a, (q + 1) // 2, p)
+        return int(powmod(a, (p + 1) // 4, p))
+    q, m, c = _tonelli_constants(int(p))
+    # Tonelli-Shanks costs O(s^2) squarings, Cipolla O(log p) multiplies
+    if m * m > p.bit_length():
+        r = _cipolla_sqrt(a, p)
+        if r is not None:
+            return r
+    t = powmod(a, q, p)
+    r = powmod(a, (q + 1) // 2, p)
     while True:
         if t == 0:
             return 0
         if t == 1:
-            return r
+            return int(r)
         i = 1
-        t2i = pow(t, 2, p)
+        t2i = powmod(t, 2, p)
         while t2i != 1:
-            t2i = pow(t2i, 2, p)
+            t2i = powmod(t2i, 2, p)
             i += 1
-        b = pow(c, 1 << (m - i - 1), p)
+        b = powmod(c, 1 << (m - i - 1), p)
         m = i
         c = (b * b) % p
         t = (t * c) % p
         r = (r * b) % p
-    return r
+    return int(r)
+
+# Width in bits of the fixed window used by scalar_mult
+_WINDOW_BITS = 5
+
+# Number of teeth of the base point comb (table of 2^(teeth - 1) points);
+# kept small because every column scans the whole table in _table_lookup
+_COMB_TEETH = 5
+
+# Base point comb tables shared by all Curve instances of the same curve
+_COMB_CACHE = {}
+
+# Point at infinity in Jacobian coordinates (any point with Z = 0)
+_JAC_INFINITY = (mpz(1), mpz(1), mpz(0))
 
-@dataclass
+# P-521 prime, the Mersenne prime 2^521 - 1
+_P521 = (1 << 521) - 1
+
+def _reduce_p521(z: int) -> int:
+    """Reduce z modulo 2^521 - 1 by folding the high bits onto the low bits."""
+    # 2^521 = 1 (mod p); the final % of the (at most 522-bit) sum is cheap
+    # and also handles z < 0
+    return ((z & _P521) + (z >> 521)) % _P521
+
+def _signed_digits(k: int, w: int, count: int) -> list:
+    """Recode an odd k into count odd digits in [-(2^w - 1), 2^w - 1], least significant first.
+
+    k = sum(d_i * 2^(w*i)) + 2^(w*count), so the implied top digit is 1 when
+    k < 2^(w*count). No digit is zero, so no window is skipped.
+    """
+    digits = []
+    for _ in range(count):
+        d = (k & ((2 << w) - 1)) - (1 << w)
+        digits.append(d)
+        k = (k - d) >> w
+    return digits
+
+def _cswap(bit: int, p1: tuple, p2: tuple) -> tuple:
+    """Swap two Jacobian points if bit is 1, using masks instead of a branch."""
+    mask = -bit
+    dx = (p1[0] ^ p2[0]) & mask
+    dy = (p1[1] ^ p2[1]) & mask
+    dz = (p1[2] ^ p2[2]) & mask
+    return (p1[0] ^ dx, p1[1] ^ dy, p1[2] ^ dz), (p2[0] ^ dx, p2[1] ^ dy, p2[2] ^ dz)
+
+@dataclass(frozen=True)
 class Point:
     """Point on an elliptic curve."""
+    # Explicit __slots__ rather than slots=True, which needs Python 3.10
+    __slots__ = ("x", "y")
     x: Optional[int]
     y: Optional[int]
 
+    # Frozen slotted instances need explicit state handling for pickle/copy
+    def __getstate__(self) -> tuple:
+        return self.x, self.y
+
+    def __setstate__(self, state: tuple) -> None:
+        object.__setattr__(self, "x", state[0])
+        object.__setattr__(self, "y", state[1])
+
     def is_infinite(self) -> bool:
         """Check if the point is the point at infinity."""
         return self.x is None or self.y is None
@@ -82,6 +182,24 @@ class Curve:
         self.g = Point(params.gx, params.gy)
         self.n = params.n
         self.h = getattr(params, "h", 1)
+        # Backend copies of the curve constants used by the field arithmetic
+        self._p = mpz(self.p)
+        self._a = mpz(self.a)
+        # NIST curves use a = -3, which allows a cheaper point doubling
+        if (self.a + 3) % self.p == 0:
+            self._jac_double = self._jac_double_am3
+            # The P-521 fold beats CPython's division, though not GMP's
+            if self.p == _P521 and not HAS_GMPY2:
+                self._jac_double = self._jac_double_p521
+                self._jac_add = self._jac_add_p521
+        # Scalars are made odd by adding n when even, so they can take one
+        # bit more than n; the window and comb cover that many bits
+        self._window_count = self.n.bit_length() // _WINDOW_BITS + 1
+        self._comb_spacing = -(-(self.n.bit_length() + 1) // _COMB_TEETH)
+        comb_key = (self.p, self.a, self.g.x, self.g.y)
+        if comb_key not in _COMB_CACHE:
+            _COMB_CACHE[comb_key] = self._build_comb_table(self.g, _COMB_TEETH)
+        self._g_comb = _COMB_CACHE[comb_key]
 
     def is_on_curve(self, point: Optional[Point]) -> bool:
         """Check if a point is on the curve."""
@@ -95,27 +213,259 @@ class Curve:
             return q
         if q is None or q.is_infinite():
             return p
-        if p.x == q.x and (p.y + q.y) % self.p == 0:
-            return None
-        if p.x == q.x:
-            m = (3 * p.x * p.x + self.a) * modinv(2 * p.y, self.p) % self.p
-        else:
-            m = (q.y - p.y) * modinv(q.x - p.x, self.p) % self.p
-        xr = (m * m - p.x - q.x) % self.p
-        yr = (m * (p.x - xr) - p.y) % self.p
-        return Point(xr, yr)
+        return self._to_affine(self._jac_add(self._to_jacobian(p), self._to_jacobian(q)))
 
     def scalar_mult(self, k: int, p: Optional[Point] = None) -> Optional[Point]:
         """Multiply point p by scalar k on the curve."""
         if p is None:
             p = self.g
-        if k % self.n == 0 or p is None:
+        if k % self.n == 0 or p is None or p.is_infinite():
+            return None
+        if p == self.g:
+            return self.scalar_mult_base(k)
+        table = self._precompute_window(p, _WINDOW_BITS)
+        k %= self.n
+        # n is odd, so adding it to an even k gives an odd multiple of the
+        # same point; odd scalars recode into signed digits that are never 0
+        k += self.n & ((k & 1) - 1)
+        result = table[0]  # the top digit is always 1
+        for digit in reversed(_signed_digits(k, _WINDOW_BITS, self._window_count)):
+            for _ in range(_WINDOW_BITS):
+                result = self._jac_double(result)
+            neg = -(digit < 0)
+            entry = self._table_lookup(table, ((digit ^ neg) - neg) >> 1)
+            result = self._jac_add(result, self._jac_cneg(entry, neg))
+        return self._to_affine(result)
+
+    def scalar_mult_ladder(self, k: int, p: Point) -> Optional[Point]:
+        """Multiply point p by scalar k with a Montgomery ladder (one add and one double per bit)."""
+        if k % self.n == 0 or p is None or p.is_infinite():
             return None
+        k %= self.n
+        # Add n or 2n so the top bit is always bit n.bit_length(); the ladder
+        # then starts below it from (P, 2P) and never works on infinity
+        bits = self.n.bit_length()
+        k1 = k + self.n
+        k2 = k1 + self.n
+        k = k2 ^ ((k1 ^ k2) & -((k1 >> bits) & 1))
+        r0 = self._to_jacobian(p)
+        r1 = self._jac_double(r0)
+        for i in range(bits - 1, -1, -1):
+            bit = (k >> i) & 1
+            r0, r1 = _cswap(bit, r0, r1)
+            r1 = self._jac_add(r0, r1)
+            r0 = self._jac_double(r0)
+            r0, r1 = _cswap(bit, r0, r1)
+        return self._to_affine(r0)
+
+    @staticmethod
+    def _table_lookup(table: list, idx: int) -> tuple:
+        """Return table[idx] by masking in every entry, so the access pattern does not depend on idx."""
+        x = y = z = 0
+        for j, (tx, ty, tz) in enumerate(table):
+            mask = -(j == idx)
+            x ^= tx & mask
+            y ^= ty & mask
+            z ^= tz & mask
+        return x, y, z
+
+    def _jac_cneg(self, point: tuple, mask: int) -> tuple:
+        """Negate a Jacobian point if mask is -1 (keep it if 0), without a branch."""
+        x, y, z = point
+        return x, y ^ ((y ^ (self._p - y)) & mask), z
+
+    def scalar_mult_two(self, k1: int, p1: Point, k2: int, p2: Point) -> Optional[Point]:
+        """Compute k1*p1 + k2*p2 with shared doublings (Shamir's trick)."""
+        if p1 is None or p1.is_infinite():
+            return self.scalar_mult(k2, p2)
+        if p2 is None or p2.is_infinite():
+            return self.scalar_mult(k1, p1)
+        k1 %= self.n
+        k2 %= self.n
+        # table[(i << 2) | j] = i*p1 + j*p2 for the joint 2-bit window
+        col = [_JAC_INFINITY, self._to_jacobian(p2)]
+        col += [self._jac_double(col[1])]
+        col += [self._jac_add(col[2], col[1])]
+        row = self._to_jacobian(p1)
+        table = list(col)
+        for i in range(1, 4):
+            base = row if i == 1 else self._jac_add(table[(i - 1) << 2], row)
+            table += [base] + [self._jac_add(base, c) for c in col[1:]]
+        result = _JAC_INFINITY
+        for shift in range((self.n.bit_length() - 1) & ~1, -1, -2):
+            result = self._jac_double(self._jac_double(result))
+            result = self._jac_add(result, table[(((k1 >> shift) & 3) << 2) | ((k2 >> shift) & 3)])
+        return self._to_affine(result)
+
+    def scalar_mult_base(self, k: int) -> Optional[Point]:
+        """Multiply the base point g by scalar k using the precomputed comb table."""
+        if k % self.n == 0:
+            return None
+        k %= self.n
+        # Odd k, as in scalar_mult
+        k += self.n & ((k & 1) - 1)
+        table = self._g_comb
+        spacing = self._comb_spacing
+        top = (_COMB_TEETH - 1) * spacing
+        flip = len(table) - 1
+        # With B = teeth * spacing and odd k < 2^B, e = (k + 2^B - 1) / 2 has
+        # bit i set where k has digit +1 at 2^i and clear where it has -1, so
+        # no column sums to 0
+        e = (k + (1 << (_COMB_TEETH * spacing)) - 1) >> 1
         result = None
-        addend = p
-        while k:
-            if k & 1:
-                result = self.point_add(result, addend)
-            addend = self.point_add(addend, addend)
-            k >>= 1
-        return result
+        for col in range(spacing - 1, -1, -1):
+            idx = 0
+            for tooth in range(_COMB_TEETH - 2, -1, -1):
+                idx = (idx << 1) | ((e >> (tooth * spacing + col)) & 1)
+            # Entries have a + top tooth; a - top tooth negates the column
+            neg = ((e >> (top + col)) & 1) - 1
+            entry = self._jac_cneg(self._table_lookup(table, idx ^ (neg & flip)), neg)
+            result = entry if result is None else self._jac_add(self._jac_double(result), entry)
+        return self._to_affine(result)
+
+    def _build_comb_table(self, point: Point, teeth: int) -> list:
+        """Return signed comb entries: 2^(top*spacing) * P plus +-2^(j*spacing) * P for each lower tooth j (+ if bit j of i is set)."""
+        spokes = [self._to_jacobian(point)]
+        for _ in range(teeth - 1):
+            spoke = spokes[-1]
+            for _ in range(self._comb_spacing):
+                spoke = self._jac_double(spoke)
+            spokes.append(spoke)
+        entry = spokes[-1]
+        for spoke in spokes[:-1]:
+            entry = self._jac_add(entry, self._jac_cneg(spoke, -1))
+        table = [entry]
+        for j in range(teeth - 1):
+            twice = self._jac_double(spokes[j])
+            table += [self._jac_add(t, twice) for t in table]
+        return table
+
+    def _precompute_window(self, point: Point, w: int) -> list:
+        """Return Jacobian odd multiples [1*P, 3*P, ..., (2^w - 1)*P]."""
+        base = self._to_jacobian(point)
+        twice = self._jac_double(base)
+        table = [base]
+        for _ in range(1, 1 << (w - 1)):
+            table.append(self._jac_add(table[-1], twice))
+        return table
+
+    def _to_jacobian(self, point: Point) -> tuple:
+        """Convert an affine point to Jacobian coordinates (X, Y, 1)."""
+        return mpz(point.x), mpz(point.y), mpz(1)
+
+    def _to_affine(self, point: tuple) -> Optional[Point]:
+        """Convert Jacobian (X, Y, Z) back to an affine Point with one inversion."""
+        x, y, z = point
+        if z == 0:
+            return None
+        p = self._p
+        zinv = _field_inv(z, p)
+        zinv2 = zinv * zinv % p
+        return Point(int(x * zinv2 % p), int(y * zinv2 * zinv % p))
+
+    def _jac_double(self, point: tuple) -> tuple:
+        """Double a point in Jacobian coordinates (any a)."""
+        x, y, z = point
+        if z == 0 or y == 0:
+            return _JAC_INFINITY
+        p = self._p
+        yy = y * y % p
+        s = 4 * x * yy % p
+        zz = z * z % p
+        m = (3 * x * x + self._a * zz * zz) % p
+        x3 = (m * m - 2 * s) % p
+        y3 = (m * (s - x3) - 8 * yy * yy) % p
+        z3 = 2 * y * z % p
+        return x3, y3, z3
+
+    def _jac_double_am3(self, point: tuple) -> tuple:
+        """Double a point in Jacobian coordinates on a curve with a = -3."""
+        x, y, z = point
+        if z == 0 or y == 0:
+            return _JAC_INFINITY
+        p = self._p
+        yy = y * y % p
+        s = 4 * x * yy % p
+        zz = z * z % p
+        # 3*x^2 + a*z^4 = 3*(x - z^2)*(x + z^2) when a = -3
+        m = 3 * (x - zz) * (x + zz) % p
+        x3 = (m * m - 2 * s) % p
+        y3 = (m * (s - x3) - 8 * yy * yy) % p
+        z3 = 2 * y * z % p
+        return x3, y3, z3
+
+    def _jac_add(self, p1: tuple, p2: tuple) -> tuple:
+        """Add two points in Jacobian coordinates."""
+        x1, y1, z1 = p1
+        x2, y2, z2 = p2
+        if z1 == 0:
+            return p2
+        if z2 == 0:
+            return p1
+        p = self._p
+        z1z1 = z1 * z1 % p
+        z2z2 = z2 * z2 % p
+        u1 = x1 * z2z2 % p
+        u2 = x2 * z1z1 % p
+        s1 = y1 * z2 * z2z2 % p
+        s2 = y2 * z1 * z1z1 % p
+        # u1, u2, s1, s2 are reduced, so the differences are zero exactly
+        # when they are zero mod p and need no reduction of their own
+        h = u2 - u1
+        r = s2 - s1
+        if h == 0:
+            if r == 0:
+                return self._jac_double(p1)
+            return _JAC_INFINITY
+        hh = h * h % p
+        hhh = h * hh % p
+        v = u1 * hh % p
+        x3 = (r * r - hhh - 2 * v) % p
+        y3 = (r * (v - x3) - s1 * hhh) % p
+        z3 = z1 * z2 * h % p
+        return x3, y3, z3
+
+    def _jac_double_p521(self, point: tuple) -> tuple:
+        """Double a point in Jacobian coordinates on P-521 (a = -3, Mersenne prime)."""
+        x, y, z = point
+        if z == 0 or y == 0:
+            return _JAC_INFINITY
+        red = _reduce_p521
+        yy = red(y * y)
+        s = red(4 * x * yy)
+        zz = red(z * z)
+        # 3*x^2 + a*z^4 = 3*(x - z^2)*(x + z^2) when a = -3
+        m = red(3 * (x - zz) * (x + zz))
+        x3 = red(m * m - 2 * s)
+        y3 = red(m * (s - x3) - 8 * yy * yy)
+        z3 = red(2 * y * z)
+        return x3, y3, z3
+
+    def _jac_add_p521(self, p1: tuple, p2: tuple) -> tuple:
+        """Add two points in Jacobian coordinates on P-521 (Mersenne prime)."""
+        x1, y1, z1 = p1
+        x2, y2, z2 = p2
+        if z1 == 0:
+            return p2
+        if z2 == 0:
+            return p1
+        red = _reduce_p521
+        z1z1 = red(z1 * z1)
+        z2z2 = red(z2 * z2)
+        u1 = red(x1 * z2z2)
+        u2 = red(x2 * z1z1)
+        s1 = red(y1 * z2 * z2z2)
+        s2 = red(y2 * z1 * z1z1)
+        h = u2 - u1
+        r = s2 - s1
+        if h == 0:
+            if r == 0:
+                return self._jac_double(p1)
+            return _JAC_INFINITY
+        hh = red(h * h)
+        hhh = red(h * hh)
+        v = red(u1 * hh)
+        x3 = red(r * r - hhh - 2 * v)
+        y3 = red(r * (v - x3) - s1 * hhh)
+        z3 = red(z1 * z2 * h)
+        return x3, y3, z3